@@ -0,0 +1,99 @@
+# benchmarks/bench_driver_profile.py
+"""
+Compare le profil Chrome d'origine (visible, toutes ressources) au profil
+léger de `core.extract.get_driver` (headless, eager, ressources bloquées).
+
+Mesure, pour chaque profil, le parcours réel du scraper : connexion
+(`login`) jusqu'à l'affichage de la première page de résultats, puis
+`--pages` passages à la page suivante (`next_page`), et la mémoire
+résidente (RSS) de chromedriver et de ses processus Chrome sur la page
+de résultats. Le profil d'origine se connecte à chaque essai (fichier de
+session neuf), le profil léger réutilise la session enregistrée.
+
+Usage :
+    python -m benchmarks.bench_driver_profile [--runs 5] [--pages 5]
+
+Cible le portail de `SODIPRESS_BASE_URL` : pour mesurer hors ligne, lancer
+`python -m benchmarks.sodipress_stub` et exporter
+SODIPRESS_BASE_URL=http://127.0.0.1:8765 ainsi que SODIPRESS_USERNAME et
+SODIPRESS_PASSWORD (valeurs quelconques pour le stub).
+
+Nécessite `psutil` en plus des dépendances du scraper.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import psutil
+
+import core.extract
+from core.extract import get_driver, login, next_page
+
+
+def driver_rss_mb(driver) -> float:
+    """RSS cumulée (Mo) de chromedriver et de tous ses processus enfants."""
+    root = psutil.Process(driver.service.process.pid)
+    total = 0
+    for proc in [root] + root.children(recursive=True):
+        try:
+            total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total / (1024 * 1024)
+
+
+def bench_profile(lean: bool, runs: int, pages: int) -> dict:
+    results_times, page_times, rss = [], [], []
+    # Fichiers de session jetables (celui du scraper n'est pas touché). Profil
+    # d'origine : fichier neuf à chaque essai, donc connexion complète comme
+    # avant la réutilisation de session ; profil léger : session réutilisée.
+    session_dir = Path(tempfile.mkdtemp(prefix="bench_session_"))
+    for run in range(runs):
+        name = "session.json" if lean else f"session_{run}.json"
+        core.extract.SESSION_FILE = session_dir / name
+
+        # Navigateur neuf à chaque essai : démarrage et connexion inclus dans la mesure
+        start = time.perf_counter()
+        driver = get_driver(lean=lean)
+        try:
+            login(driver)
+            results_times.append(time.perf_counter() - start)
+
+            for _ in range(pages):
+                start = time.perf_counter()
+                if not next_page(driver):
+                    break
+                page_times.append(time.perf_counter() - start)
+
+            rss.append(driver_rss_mb(driver))
+        finally:
+            driver.quit()
+
+    return {
+        "profile": "léger" if lean else "origine",
+        "results_median_s": statistics.median(results_times),
+        "next_page_median_s": statistics.median(page_times) if page_times else float("nan"),
+        "rss_mb": max(rss),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=5, help="passages à la page suivante par essai")
+    args = parser.parse_args()
+
+    results = [bench_profile(lean, args.runs, args.pages) for lean in (False, True)]
+
+    print(f"{'Profil':<10}{'Résultats (s)':>15}{'Page suiv. (s)':>16}{'RSS (Mo)':>12}")
+    for r in results:
+        print(
+            f"{r['profile']:<10}{r['results_median_s']:>15.2f}"
+            f"{r['next_page_median_s']:>16.2f}{r['rss_mb']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# benchmarks/load_test.py
+"""
+Banc de charge de bout en bout, sans accès au vrai portail.
+
+Scénarios (pour chaque taille, 1k/10k/100k AO par défaut) :
+- extraction     : `extract_aos` complet contre le stub local (Chrome requis)
+- normalisation  : analyse HTML des pages du stub + fusion + `normalize_aos`
+- upsert         : `save_and_mark_new` dans la base `--db-url`
+- deduplication  : `apply_duplicate_groups` sur les AO enregistrées
+- visualisation  : `load_last_scraping_results` (12 derniers mois, puis tout)
+
+Les scénarios base de données ne tournent qu'avec `--db-url`, qui doit désigner
+une base jetable : les tables des AO y sont vidées avant chaque taille.
+
+Les résultats sont écrits en JSON (un fichier par exécution) pour suivre les
+régressions d'une version à l'autre.
+
+Usage :
+    python -m benchmarks.load_test --db-url postgresql://.../AppelOffreBench \\
+        [--sizes 1000 10000 100000] [--scenarios normalisation upsert] [--workers 4]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.sodipress_stub import PAGE_SIZE, render_results, start_stub
+
+SCENARIOS = ["extraction", "normalisation", "upsert", "deduplication", "visualisation"]
+DB_SCENARIOS = {"upsert", "deduplication", "visualisation"}
+
+
+def git_version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnue"
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+# ----------------------------------------------------------------------
+# Scénarios
+# ----------------------------------------------------------------------
+def run_extraction(size: int, port: int, workers: int) -> dict:
+    from core.extract import extract_aos
+
+    server = start_stub(size, port)
+    try:
+        df, seconds = timed(lambda: extract_aos(workers=workers))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return {"seconds": seconds, "rows": len(df), "workers": workers}
+
+
+def run_normalisation(size: int) -> tuple:
+    from core.extract import merge_pages, parse_ao_cards
+    from db.queries import normalize_aos
+
+    pages = [render_results(p, size) for p in range(1, -(-size // PAGE_SIZE) + 1)]
+
+    start = time.perf_counter()
+    pages_rows = {p: parse_ao_cards(source) for p, source in enumerate(pages, start=1)}
+    parse_seconds = time.perf_counter() - start
+    df = merge_pages(pages_rows)
+    normalize_aos(df.copy())
+    seconds = time.perf_counter() - start
+
+    return df, {"seconds": seconds, "parse_seconds": parse_seconds, "rows": len(df)}
+
+
+def reset_database():
+    from sqlalchemy import text
+    from db.database import engine
+    from db.utils import ensure_tables
+
+    ensure_tables()
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE appels_offres, ao_minhash, ao_lsh_bands, ao_details, scraping_metadata;"))
+
+
+def run_upsert(df) -> tuple:
+    from db.queries import save_and_mark_new
+
+    saved, seconds = timed(lambda: save_and_mark_new(df.copy()))
+    return saved, {"seconds": seconds, "rows": len(saved)}
+
+
+def run_deduplication(saved) -> dict:
+    from core.dedup import apply_duplicate_groups
+
+    grouped, seconds = timed(lambda: apply_duplicate_groups(saved.copy()))
+    return {
+        "seconds": seconds,
+        "rows": len(grouped),
+        "groups": int(grouped["groupe_id"].nunique()) if "groupe_id" in grouped else None,
+    }
+
+
+def run_visualisation() -> dict:
+    from db.queries import load_last_scraping_results
+
+    recent, recent_seconds = timed(lambda: load_last_scraping_results(months=12))
+    full, full_seconds = timed(load_last_scraping_results)
+    return {
+        "seconds": recent_seconds + full_seconds,
+        "rows": len(recent) + len(full),
+        "recent_seconds": recent_seconds,
+        "recent_rows": len(recent),
+        "full_seconds": full_seconds,
+        "full_rows": len(full),
+    }
+
+
+# ----------------------------------------------------------------------
+# Exécution
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Banc de charge du scraper et de la base")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--db-url", help="base jetable pour les scénarios base de données")
+    parser.add_argument("--workers", type=int, default=1, help="navigateurs parallèles (extraction)")
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    # Configuration lue à l'import par utils.config : à fixer avant tout import du projet
+    os.environ["SODIPRESS_BASE_URL"] = f"http://127.0.0.1:{args.stub_port}"
+    os.environ["SODIPRESS_SESSION_FILE"] = str(Path(tempfile.gettempdir()) / "sodipress_stub_session.json")
+    # Le stub accepte n'importe quels identifiants
+    os.environ.setdefault("SODIPRESS_USERNAME", "bench")
+    os.environ.setdefault("SODIPRESS_PASSWORD", "bench")
+    if args.db_url:
+        os.environ["DATABASE_URL"] = args.db_url
+
+    scenarios = [s for s in args.scenarios if s not in DB_SCENARIOS or args.db_url]
+    skipped = sorted(set(args.scenarios) - set(scenarios))
+    if skipped:
+        print(f"⚠️ Scénarios ignorés sans --db-url : {', '.join(skipped)}")
+
+    results = []
+    for size in args.sizes:
+        df = saved = None
+        if DB_SCENARIOS & set(scenarios):
+            reset_database()
+
+        for scenario in SCENARIOS:
+            if scenario not in scenarios:
+                continue
+            try:
+                if scenario == "extraction":
+                    metrics = run_extraction(size, args.stub_port, args.workers)
+                elif scenario == "normalisation":
+                    df, metrics = run_normalisation(size)
+                else:
+                    # Les scénarios base de données réutilisent les AO déjà préparées
+                    if df is None:
+                        df, _ = run_normalisation(size)
+                    if scenario == "upsert":
+                        saved, metrics = run_upsert(df)
+                    else:
+                        if saved is None:
+                            saved, _ = run_upsert(df)
+                        if scenario == "deduplication":
+                            metrics = run_deduplication(saved)
+                        else:
+                            metrics = run_visualisation()
+            except Exception as e:
+                metrics = {"error": f"{type(e).__name__}: {e}"}
+
+            metrics = {"scenario": scenario, "size": size, **metrics}
+            # Débit calculé sur les AO réellement traitées, pas sur la taille demandée
+            if metrics.get("seconds") and "rows" in metrics:
+                metrics["ao_per_second"] = metrics["rows"] / metrics["seconds"]
+            results.append(metrics)
+            print(f"⏱️ {scenario:<14} {size:>7} AO : " + (
+                f"{metrics['seconds']:.2f}s" if "seconds" in metrics else metrics["error"]
+            ))
+
+    report = {
+        "version": git_version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = args.output or Path("bench_results") / f"load_test_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"📄 Résultats : {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# benchmarks/sodipress_stub.py
+"""
+Serveur local imitant le portail Sodipress pour mesurer le scraper hors ligne.
+
+Reproduit le parcours de `core.extract` : formulaire de connexion, lien
+`MesMarches`, bouton `rechercheaoG`, puis `N` cartes AO synthétiques paginées
+par l'appel XHR `getAoByPage(n)`, avec le balisage attendu par `parse_ao_cards`,
+et leurs pages `DetailAO`.
+
+Usage autonome :
+    python -m benchmarks.sodipress_stub --cards 10000 --port 8765 [--latency 0.2]
+puis lancer le scraper avec SODIPRESS_BASE_URL=http://127.0.0.1:8765
+"""
+import argparse
+import html
+import random
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGE_SIZE = 10
+SESSION_COOKIE = "stub_session=ok"
+# Ancienneté maximale des AO générées : dans la rétention par défaut (24 mois),
+# sinon `save_and_mark_new` écarte une partie des AO des mois archivés
+MAX_AGE_DAYS = 540
+
+ORGANISMES = [
+    "COMMUNE DE RABAT", "OFFICE NATIONAL DE L'ELECTRICITE ET DE L'EAU POTABLE",
+    "MINISTERE DE L'EQUIPEMENT ET DE L'EAU", "REGION CASABLANCA-SETTAT",
+    "UNIVERSITE MOHAMMED V", "AGENCE URBAINE DE TANGER",
+]
+TYPES = ["APPEL D'OFFRES OUVERT", "CONCOURS", "MARCHÉ NÉGOCIÉ"]
+VILLES = ["Rabat", "Casablanca", "Tanger", "Fès", "Marrakech", "Agadir"]
+OBJETS = [
+    "Travaux d'aménagement de la voirie", "Fourniture de matériel informatique",
+    "Entretien des espaces verts", "Construction d'un centre de santé",
+    "Étude technique du réseau d'assainissement", "Acquisition de véhicules utilitaires",
+]
+
+
+# ----------------------------------------------------------------------
+# 1.  Données synthétiques
+# ----------------------------------------------------------------------
+def synthetic_ao(index: int) -> dict:
+    """AO déterministe n°`index` (mêmes valeurs d'une exécution à l'autre)."""
+    rng = random.Random(index)
+    posted = date.today() - timedelta(days=rng.randint(0, MAX_AGE_DAYS))
+    return {
+        "id": index,
+        "organisme": rng.choice(ORGANISMES),
+        "date_poste": posted.strftime("%d/%m/%Y"),
+        "type_offre": rng.choice(TYPES),
+        "ville": rng.choice(VILLES),
+        "numero_ordre": str(100000 + index),
+        "numero_ao": f"{rng.randint(1, 999)}/{posted.year}",
+        "date_limite": (posted + timedelta(days=rng.randint(15, 60))).strftime("%d/%m/%Y"),
+        "caution": f"{rng.randint(1, 500) * 1000:,} DH".replace(",", " "),
+        "estimation": f"{rng.randint(50, 50000) * 1000:,} DH".replace(",", " "),
+        "description": f"{rng.choice(OBJETS)} - lot {rng.randint(1, 20)} ({rng.choice(VILLES)})",
+    }
+
+
+def render_card(ao: dict) -> str:
+    def attribute(label, value):
+        return (
+            '<div class="d-flex align-items-center flex-lg-fill mr-5 my-1">'
+            f'<span class="font-weight-bolder font-size-sm">{label}</span>'
+            f'<span class="font-weight-bolder font-size-sm">{html.escape(value)}</span>'
+            "</div>"
+        )
+
+    return (
+        '<div class="card card-dashed card-custom gutter-b">'
+        f'<a class="DetailAO" href="/DetailAO?id={ao["id"]}">{html.escape(ao["organisme"])}</a>'
+        '<div class="d-flex flex-wrap my-2">'
+        f'<a class="text-muted text-hover-primary font-weight-bold mr-lg-8 mr-5 mb-lg-0 mb-2">{ao["date_poste"]}</a>'
+        f'<a class="text-muted text-hover-primary font-weight-bold mr-lg-8 mr-5 mb-lg-0 mb-2">{html.escape(ao["type_offre"])}</a>'
+        f'<a class="text-muted text-hover-primary font-weight-bold">{html.escape(ao["ville"])}</a>'
+        "</div>"
+        + attribute("N°Ordre", ao["numero_ordre"])
+        + attribute("N° AO", ao["numero_ao"])
+        + attribute("Date Limite", ao["date_limite"])
+        + attribute("Caution", ao["caution"])
+        + attribute("Estimation", ao["estimation"])
+        + '<div class="flex-grow-1 font-weight-bolder font-size-h5 py-2 py-lg-2 mr-5">'
+        f'{html.escape(ao["description"])}</div>'
+        "</div>"
+    )
+
+
+def render_results(page: int, total_cards: int) -> str:
+    """Cartes de la page `page` et pagination (fragment renvoyé par getAoByPage)."""
+    last = max(1, -(-total_cards // PAGE_SIZE))
+    page = min(max(page, 1), last)
+    start = (page - 1) * PAGE_SIZE
+    cards = "".join(
+        render_card(synthetic_ao(i)) for i in range(start, min(start + PAGE_SIZE, total_cards))
+    )
+
+    pager = ['<ul class="pagination">']
+    for p in sorted({1, max(1, page - 2), max(1, page - 1), page, min(last, page + 1), min(last, page + 2), last}):
+        active = ' class="active"' if p == page else ""
+        pager.append(f'<li{active}><a href="#" onclick="getAoByPage({p}); return false;">{p}</a></li>')
+    if page < last:
+        pager.append(
+            f'<li><a href="#" onclick="getAoByPage({page + 1}); return false;">'
+            '<i class="ki ki-bold-arrow-next icon-xs"></i></a></li>'
+        )
+    pager.append("</ul>")
+    return cards + "".join(pager)
+
+
+# ----------------------------------------------------------------------
+# 2.  Pages du portail
+# ----------------------------------------------------------------------
+LOGIN_PAGE = """<html><body>
+<form method="post" action="/Account/Login">
+  <input name="username"><input name="password" type="password">
+  <button id="kt_login_signin_submit" type="submit">Connexion</button>
+</form></body></html>"""
+
+HOME_PAGE = """<html><body><a id="MesMarches" href="/MesMarches">Mes marchés</a></body></html>"""
+
+MES_MARCHES_PAGE = """<html><body><a id="rechercheaoG" href="/Recherche">Rechercher</a></body></html>"""
+
+DETAIL_PAGE = """<html><body>
+<div><span class="font-weight-bolder">Acheteur :</span><span>{organisme} - Service des marchés</span></div>
+<div><span class="font-weight-bolder">N°Ordre</span><span>{numero_ordre}</span></div>
+<table><tr><th>Lot</th><th>Objet</th><th>Caution</th></tr>{lots}</table>
+<a href="/Telecharger/{id}/reglement.pdf">Règlement de consultation</a>
+<a href="/Telecharger/{id}/cps.pdf">Cahier des prescriptions spéciales</a>
+</body></html>"""
+
+SEARCH_PAGE = """<html><body>
+<div id="results">{results}</div>
+<script>
+function getAoByPage(page) {{
+    const xhr = new XMLHttpRequest();
+    xhr.open("GET", "/getAoByPage?page=" + page);
+    xhr.onload = () => {{ document.getElementById("results").innerHTML = xhr.responseText; }};
+    xhr.send();
+}}
+</script></body></html>"""
+
+
+def make_handler(total_cards: int, latency: float):
+    class SodipressStubHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _logged_in(self) -> bool:
+            return SESSION_COOKIE in (self.headers.get("Cookie") or "")
+
+        def _send(self, body: str, status: int = 200, headers: dict | None = None):
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _redirect(self, location: str, headers: dict | None = None):
+            self._send("", 302, {"Location": location, **(headers or {})})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if urlparse(self.path).path == "/Account/Login":
+                self._redirect("/", {"Set-Cookie": f"{SESSION_COOKIE}; Path=/"})
+            else:
+                self._send("Not found", 404)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/Account/Login":
+                return self._send(LOGIN_PAGE)
+            if not self._logged_in():
+                return self._redirect("/Account/Login?ReturnUrl=%2F")
+
+            if url.path == "/":
+                self._send(HOME_PAGE)
+            elif url.path == "/MesMarches":
+                self._send(MES_MARCHES_PAGE)
+            elif url.path == "/Recherche":
+                self._send(SEARCH_PAGE.format(results=render_results(1, total_cards)))
+            elif url.path == "/DetailAO":
+                ao = synthetic_ao(int(parse_qs(url.query).get("id", ["0"])[0]))
+                lots = "".join(
+                    f"<tr><td>{n}</td><td>{html.escape(ao['description'])}</td><td>{ao['caution']}</td></tr>"
+                    for n in range(1, 4)
+                )
+                self._send(DETAIL_PAGE.format(
+                    organisme=html.escape(ao["organisme"]), numero_ordre=ao["numero_ordre"], lots=lots, id=ao["id"]
+                ))
+            elif url.path == "/getAoByPage":
+                if latency:
+                    threading.Event().wait(latency)
+                page = int(parse_qs(url.query).get("page", ["1"])[0])
+                self._send(render_results(page, total_cards))
+            else:
+                self._send("Not found", 404)
+
+    return SodipressStubHandler
+
+
+def start_stub(total_cards: int, port: int = 0, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Démarre le stub dans un thread ; `server.server_address` donne le port choisi."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(total_cards, latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local du portail Sodipress")
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="délai (s) de getAoByPage")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.cards, args.latency))
+    print(f"🧪 Stub Sodipress : http://127.0.0.1:{args.port} ({args.cards} AO)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# core/dedup.py
+"""
+Détection des AO republiés (quasi-doublons).
+
+Une même AO est souvent republiée avec un nouveau numéro d'ordre ou une date
+corrigée : la contrainte UNIQUE (numero_ordre, date_poste) ne les rapproche pas.
+Chaque AO reçoit une signature MinHash calculée sur l'organisme et la description
+normalisés. Les signatures sont indexées par bandes LSH (tables `ao_minhash` et
+`ao_lsh_bands`), si bien qu'une nouvelle AO n'est comparée qu'aux AO partageant
+au moins une bande, jamais à tout l'historique. Les AO similaires partagent un
+`groupe_id` : l'id de la plus ancienne AO du groupe.
+
+Un texte similaire ne suffit pas : les deux AO doivent être postées à moins de
+`REPUBLICATION_WINDOW_DAYS` jours d'intervalle (un appel annuel au même libellé
+reste une nouvelle AO), et un numéro d'AO ou un numéro de lot différent les
+distingue (lots d'un même marché).
+"""
+import hashlib
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from db.database import engine
+from db.queries import mark_republished
+from db.utils import ensure_tables
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+# Similarité de Jaccard estimée au-delà de laquelle deux AO sont regroupées
+SIMILARITY_THRESHOLD = 0.8
+# Écart maximal entre les dates de poste d'une AO et de sa republication
+REPUBLICATION_WINDOW_DAYS = 90
+CHUNK_SIZE = 2000
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Permutations fixes : les signatures stockées doivent rester comparables d'une exécution à l'autre
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+# ----------------------------------------------------------------------
+# 1.  Signatures MinHash
+# ----------------------------------------------------------------------
+def normalize_text(value) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces normalisés."""
+    if not isinstance(value, str) or value == "Non spécifié":
+        return ""
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c)).lower()
+    value = re.sub(r"[^a-z0-9]+", " ", value)
+    return value.strip()
+
+
+def shingles(value: str) -> set:
+    """Sous-chaînes de `SHINGLE_SIZE` caractères."""
+    if len(value) <= SHINGLE_SIZE:
+        return {value} if value else set()
+    return {value[i:i + SHINGLE_SIZE] for i in range(len(value) - SHINGLE_SIZE + 1)}
+
+
+def minhash(tokens: set) -> np.ndarray | None:
+    """Signature MinHash (NUM_PERM entiers 32 bits), None si le texte est vide."""
+    if not tokens:
+        return None
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=4).digest(), "little") for t in tokens],
+        dtype=np.uint64,
+    )
+    # Débordement uint64 volontaire, comme dans l'implémentation de référence (datasketch)
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+def ao_signature(organisme, description) -> np.ndarray | None:
+    return minhash(shingles(f"{normalize_text(organisme)} {normalize_text(description)}".strip()))
+
+
+def lot_numbers(description) -> frozenset:
+    """Numéros de lot cités dans la description (« lot 3 », « lot n°3 »)."""
+    return frozenset(re.findall(r"\blot\s*(?:n\s*o?\s*)?(\d+)", normalize_text(description)))
+
+
+def ao_identity(date_poste, numero_ao, description) -> tuple:
+    """Éléments qui distinguent deux AO au texte similaire."""
+    date_poste = None if date_poste is None or pd.isna(date_poste) else pd.Timestamp(date_poste)
+    return date_poste, normalize_text(numero_ao), lot_numbers(description)
+
+
+def same_tender(identity_a: tuple, identity_b: tuple) -> bool:
+    """
+    Deux AO au texte similaire ne sont regroupées que si elles sont postées dans
+    la fenêtre de republication et que leurs numéros d'AO et de lot concordent.
+    """
+    date_a, numero_a, lots_a = identity_a
+    date_b, numero_b, lots_b = identity_b
+    if date_a is None or date_b is None or abs(date_a - date_b) > pd.Timedelta(days=REPUBLICATION_WINDOW_DAYS):
+        return False
+    if numero_a and numero_b and numero_a != numero_b:
+        return False
+    if lots_a and lots_b and lots_a != lots_b:
+        return False
+    return True
+
+
+def band_buckets(signature: np.ndarray) -> list:
+    """Une clé (bande, bucket signé 64 bits) par bande LSH."""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimation de la similarité de Jaccard entre deux signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+# ----------------------------------------------------------------------
+# 2.  Regroupement incrémental
+# ----------------------------------------------------------------------
+def assign_duplicate_groups(chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Attribue un `groupe_id` à toutes les AO qui n'en ont pas encore (nouvelles
+    ou dont le texte a changé). Retourne le nombre d'AO traitées.
+    """
+    ensure_tables()
+    processed = 0
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text("""
+                    SELECT id, organisme, description, date_poste, numero_ao FROM appels_offres
+                    WHERE groupe_id IS NULL
+                    ORDER BY id
+                    LIMIT :limit
+                """),
+                {"limit": chunk_size}
+            ).fetchall()
+            if not rows:
+                break
+
+            ids = [r[0] for r in rows]
+            # Texte modifié : l'ancienne signature n'est plus valable
+            conn.execute(
+                text("DELETE FROM ao_lsh_bands WHERE ao_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": ids}
+            )
+            conn.execute(
+                text("DELETE FROM ao_minhash WHERE ao_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": ids}
+            )
+
+            signatures = {ao_id: ao_signature(org, desc) for ao_id, org, desc, _, _ in rows}
+            keys = {ao_id: band_buckets(sig) for ao_id, sig in signatures.items() if sig is not None}
+            known_identity = {
+                ao_id: ao_identity(date_poste, numero_ao, desc) for ao_id, _, desc, date_poste, numero_ao in rows
+            }
+
+            # Candidats déjà indexés partageant au moins une bande avec le lot, dans la fenêtre de republication
+            index, known_sig, known_group = {}, {}, {}
+            all_buckets = list({bucket for buckets in keys.values() for _, bucket in buckets})
+            dates = [known_identity[ao_id][0] for ao_id in keys if known_identity[ao_id][0] is not None]
+            if all_buckets and dates:
+                window = pd.Timedelta(days=REPUBLICATION_WINDOW_DAYS)
+                candidates = conn.execute(
+                    text("""
+                        SELECT b.band, b.bucket, b.ao_id, m.signature, a.groupe_id,
+                               a.date_poste, a.numero_ao, a.description
+                        FROM ao_lsh_bands b
+                        JOIN ao_minhash m ON m.ao_id = b.ao_id
+                        JOIN appels_offres a ON a.id = b.ao_id
+                        WHERE b.bucket IN :buckets
+                          AND a.date_poste BETWEEN :since AND :until
+                    """).bindparams(bindparam("buckets", expanding=True)),
+                    {
+                        "buckets": all_buckets,
+                        "since": (min(dates) - window).to_pydatetime(),
+                        "until": (max(dates) + window).to_pydatetime(),
+                    }
+                )
+                for band, bucket, ao_id, signature, groupe_id, date_poste, numero_ao, desc in candidates:
+                    index.setdefault((band, bucket), set()).add(ao_id)
+                    known_sig[ao_id] = np.frombuffer(bytes(signature), dtype=np.uint32)
+                    known_group[ao_id] = groupe_id or ao_id
+                    known_identity[ao_id] = ao_identity(date_poste, numero_ao, desc)
+
+            # Les AO du lot sont indexées au fur et à mesure : les doublons internes au lot sont aussi détectés
+            groups = {}
+            for ao_id in ids:
+                signature = signatures[ao_id]
+                group = ao_id
+                if signature is not None:
+                    matches = set().union(*(index.get(key, set()) for key in keys[ao_id]))
+                    for other in matches:
+                        if (
+                            similarity(signature, known_sig[other]) >= SIMILARITY_THRESHOLD
+                            and same_tender(known_identity[ao_id], known_identity[other])
+                        ):
+                            group = min(group, known_group[other])
+                    for key in keys[ao_id]:
+                        index.setdefault(key, set()).add(ao_id)
+                    known_sig[ao_id] = signature
+                known_group[ao_id] = group
+                groups[ao_id] = group
+
+            indexed = [ao_id for ao_id in ids if signatures[ao_id] is not None]
+            if indexed:
+                conn.execute(
+                    text("INSERT INTO ao_minhash (ao_id, signature) VALUES (:ao_id, :signature)"),
+                    [{"ao_id": ao_id, "signature": signatures[ao_id].tobytes()} for ao_id in indexed]
+                )
+                conn.execute(
+                    text("INSERT INTO ao_lsh_bands (bucket, band, ao_id) VALUES (:bucket, :band, :ao_id) ON CONFLICT DO NOTHING"),
+                    [
+                        {"bucket": bucket, "band": band, "ao_id": ao_id}
+                        for ao_id in indexed
+                        for band, bucket in keys[ao_id]
+                    ]
+                )
+            conn.execute(
+                text("UPDATE appels_offres SET groupe_id = :groupe_id WHERE id = :id"),
+                [{"groupe_id": group, "id": ao_id} for ao_id, group in groups.items()]
+            )
+
+        processed += len(rows)
+
+    return processed
+
+
+def apply_duplicate_groups(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Regroupe les AO venant d'être enregistrées puis ajoute `groupe_id` au
+    DataFrame (colonne `id` issue de `save_and_mark_new`) : une republication
+    d'une AO déjà connue n'est plus comptée comme nouvelle.
+    """
+    processed = assign_duplicate_groups()
+    print(f"🧬 Déduplication : {processed} AO indexées")
+
+    if "id" not in df.columns or df.empty:
+        return df
+
+    ids = [int(i) for i in df["id"].dropna().unique()]
+    with engine.connect() as conn:
+        result = conn.execute(
+            text("SELECT id, groupe_id FROM appels_offres WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": ids}
+        )
+        groups = dict(result.fetchall())
+
+    df["groupe_id"] = df["id"].map(groups)
+    return mark_republished(df)
@@ -8,25 +8,83 @@ from selenium.common.exceptions import (
     TimeoutException,
     NoSuchElementException,
     NoAlertPresentException,
+    WebDriverException,
 )
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from http.client import HTTPException
+from urllib.error import URLError
+from urllib.parse import urljoin
+from urllib.request import Request, urlopen
 import pandas as pd
+import hashlib
+import json
+import multiprocessing
+import os
 import re
 import time
 
-LOGIN_URL = "https://client.sodipress.com/Account/Login?ReturnUrl=%2F"
+from db.queries import load_checkpoint_pages, save_checkpoint_page, load_detail_hashes, save_ao_details
+from utils.config import (
+    DETAIL_CACHE_DIR,
+    DETAIL_WORKERS,
+    HOME_URL,
+    LOGIN_URL,
+    MAX_PARALLEL_SESSIONS,
+    SESSION_FILE,
+    SODIPRESS_HOST,
+    SODIPRESS_PASSWORD,
+    SODIPRESS_USERNAME,
+)
+
+# Ressources inutiles au scraping, bloquées via le protocole DevTools (profil léger)
+BLOCKED_RESOURCES = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico",
+    "*.css",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+# Reprise sur erreurs transitoires (timeout, élément périmé, alerte DataTables…)
+MAX_PAGE_RETRIES = 3
+RETRY_BACKOFF = 2  # secondes, doublé à chaque nouvelle tentative
+MAX_SESSION_RESTARTS = 2
+
+# Attente adaptative des changements de page (voir `wait_for_page_load`)
+PAGE_LOAD_TIMEOUT = 20  # secondes
+PAGE_POLL_INTERVAL = 0.1
 
 # ----------------------------------------------------------------------
 # 1.  Création du navigateur (URL intégrée + gestion d’alertes)
 # ----------------------------------------------------------------------
-def get_driver() -> webdriver.Chrome:
-    """Instancie Chrome, accepte automatiquement toute alerte et ouvre Sodipress."""
+def get_driver(lean: bool = True) -> webdriver.Chrome:
+    """
+    Instancie Chrome, accepte automatiquement toute alerte et ouvre Sodipress.
+
+    Le profil léger (`lean=True`) tourne en headless, n'attend que le DOM
+    (stratégie 'eager') et bloque images, feuilles de style et polices.
+    `lean=False` conserve le navigateur visible d'origine.
+    """
     opts = Options()
-    opts.add_argument("--start-maximized")
     # Chrome acceptera automatiquement toute alerte non gérée
     opts.set_capability("unhandledPromptBehavior", "accept")
 
+    if lean:
+        opts.add_argument("--headless=new")
+        opts.add_argument("--window-size=1920,1080")
+        opts.add_argument("--disable-gpu")
+        opts.add_argument("--disable-dev-shm-usage")
+        opts.add_argument("--disable-extensions")
+        opts.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
+        opts.page_load_strategy = "eager"
+    else:
+        opts.add_argument("--start-maximized")
+
     driver = webdriver.Chrome(options=opts)
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCES})
     driver.get(LOGIN_URL)
     return driver
 
@@ -46,28 +104,44 @@ def clear_datatables_alert(driver: webdriver.Chrome, timeout: int = 2) -> None:
         pass
 
 
+def with_retries(action, driver: webdriver.Chrome, description: str):
+    """
+    Exécute `action()` en réessayant sur erreur Selenium, avec un délai
+    exponentiel (`RETRY_BACKOFF`, puis ×2). Relève la dernière erreur si toutes
+    les tentatives échouent.
+    """
+    for attempt in range(1, MAX_PAGE_RETRIES + 1):
+        try:
+            return action()
+        except WebDriverException as e:
+            if attempt == MAX_PAGE_RETRIES:
+                raise
+            delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+            print(
+                f"⚠️ {description} : tentative {attempt}/{MAX_PAGE_RETRIES} échouée "
+                f"({type(e).__name__}), nouvel essai dans {delay}s"
+            )
+            time.sleep(delay)
+            clear_datatables_alert(driver, timeout=0)
+
+
 # ----------------------------------------------------------------------
 # 2.  Connexion
 # ----------------------------------------------------------------------
 def login(driver: webdriver.Chrome) -> None:
-    """Se connecter à Sodipress et atteindre la liste des AO."""
-
-    # Attendre que le champ de connexion soit présent ou lever une erreur dans un délai de 10 seconds au maximum
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.NAME, "username"))
-    )
+    """Se connecter à Sodipress (sauf session encore valide) et atteindre la liste des AO."""
 
-    # Remplir les champs de connexion et soumettre le formulaire
-    driver.find_element(By.NAME, "username").send_keys("MUNERISCONSILIA")
-    driver.find_element(By.NAME, "password").send_keys("MUNERISCONSILIA1")
-    driver.find_element(By.ID, "kt_login_signin_submit").click()
-
-    WebDriverWait(driver, 10).until(EC.url_contains("client.sodipress.com"))
-    print("✅ Connexion réussie")
+    restored = restore_session(driver)
+    if restored:
+        print("✅ Session restaurée, connexion ignorée")
+    else:
+        authenticate(driver)
 
     WebDriverWait(driver, 10).until(
         EC.presence_of_element_located((By.ID, "MesMarches"))
     )
+    if not restored:
+        save_session(driver)
     driver.find_element(By.ID, "MesMarches").click()
 
     # Lancer la recherche sans passer par la recherche avancée
@@ -85,6 +159,98 @@ def login(driver: webdriver.Chrome) -> None:
     print("✅ Navigation vers la page des AO réussie")
 
 
+def authenticate(driver: webdriver.Chrome) -> None:
+    """Remplit et soumet le formulaire de connexion."""
+    if not SODIPRESS_USERNAME or not SODIPRESS_PASSWORD:
+        raise RuntimeError(
+            "Identifiants Sodipress manquants : définir SODIPRESS_USERNAME et SODIPRESS_PASSWORD"
+        )
+
+    # Attendre que le champ de connexion soit présent ou lever une erreur dans un délai de 10 seconds au maximum
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.NAME, "username"))
+    )
+
+    # Remplir les champs de connexion et soumettre le formulaire
+    driver.find_element(By.NAME, "username").send_keys(SODIPRESS_USERNAME)
+    driver.find_element(By.NAME, "password").send_keys(SODIPRESS_PASSWORD)
+    driver.find_element(By.ID, "kt_login_signin_submit").click()
+
+    WebDriverWait(driver, 10).until(EC.url_contains(SODIPRESS_HOST))
+    print("✅ Connexion réussie")
+
+
+def save_session(driver: webdriver.Chrome) -> None:
+    """
+    Enregistre les cookies de la session courante dans `SESSION_FILE`.
+    Écriture atomique (fichier temporaire puis `os.replace`) : les processus de
+    l'extraction parallèle ne lisent jamais un fichier à moitié écrit.
+    """
+    tmp = SESSION_FILE.with_name(f"{SESSION_FILE.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(json.dumps(driver.get_cookies()), encoding="utf-8")
+        os.replace(tmp, SESSION_FILE)
+    except OSError as e:
+        tmp.unlink(missing_ok=True)
+        print(f"⚠️ Impossible d'enregistrer la session : {e}")
+
+
+def restore_session(driver: webdriver.Chrome) -> bool:
+    """
+    Recharge les cookies de `SESSION_FILE` et vérifie que la session est
+    toujours ouverte. Retourne False (et supprime le fichier) sinon.
+    """
+    if not SESSION_FILE.exists():
+        return False
+
+    try:
+        cookies = json.loads(SESSION_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        SESSION_FILE.unlink(missing_ok=True)
+        return False
+
+    now = time.time()
+    for cookie in cookies:
+        if cookie.get("expiry") and cookie["expiry"] < now:
+            continue
+        cookie.pop("sameSite", None)
+        try:
+            driver.add_cookie(cookie)
+        except WebDriverException:
+            pass
+
+    driver.get(HOME_URL)
+    try:
+        WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.ID, "MesMarches"))
+        )
+        return True
+    except TimeoutException:
+        SESSION_FILE.unlink(missing_ok=True)
+        driver.get(LOGIN_URL)
+        return False
+
+
+def open_session(page: int = 1):
+    """
+    Ouvre un navigateur connecté positionné sur la page `page`.
+    Retourne None si cette page n'existe pas (extraction déjà terminée).
+    """
+    driver = get_driver()
+    try:
+        login(driver)
+        clear_datatables_alert(driver)
+        if page > 1 and not with_retries(
+            lambda: goto_page(driver, page, current=1), driver, f"Accès à la page {page}"
+        ):
+            driver.quit()
+            return None
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
 # ----------------------------------------------------------------------
 # 3.  Utilitaires de nettoyage
 # ----------------------------------------------------------------------
@@ -102,69 +268,312 @@ def clean_numeric_value(text: str):
 # ----------------------------------------------------------------------
 # 4.  Extraction principale
 # ----------------------------------------------------------------------
-def extract_aos() -> pd.DataFrame:
-    driver = get_driver()
-    login(driver)
-    clear_datatables_alert(driver)
+def extract_aos(checkpoint: dict | None = None, workers: int | None = None) -> pd.DataFrame:
+    """
+    Parcourt toutes les pages d'AO et retourne un DataFrame.
 
-    ao_list = []
+    Avec plusieurs `workers` (par défaut : nombre de cœurs, plafonné à
+    `MAX_PARALLEL_SESSIONS`), les pages sont réparties en plages contiguës
+    extraites en parallèle, chacune par son propre navigateur.
 
-    while True:
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        ao_cards = soup.find_all(
-            "div", class_="card card-dashed card-custom gutter-b"
+    Si `checkpoint` est fourni (voir `db.queries.start_crawl_checkpoint`), chaque
+    page extraite est sauvegardée en base et seules les pages manquantes sont
+    extraites lors d'une reprise. Les pages restées illisibles sont listées dans
+    `df.attrs["pages_manquantes"]`.
+    """
+    if workers is None:
+        workers = default_workers()
+    checkpoint_id = checkpoint["id"] if checkpoint else None
+
+    pages_rows = load_checkpoint_pages(checkpoint_id) if checkpoint else {}
+    if pages_rows:
+        print(
+            f"🔁 Reprise de l'extraction : {len(pages_rows)} pages "
+            f"({sum(len(rows) for rows in pages_rows.values())} AO) déjà collectées"
         )
 
-        for ao in ao_cards:
+    if workers > 1:
+        pages_rows.update(crawl_sharded(set(pages_rows), workers, checkpoint_id))
+    else:
+        pages_rows.update(crawl_sequential(set(pages_rows), checkpoint_id))
+
+    # Pages illisibles (valeur None) : absentes du point de reprise, à relire lors d'une reprise
+    missing = sorted(page for page, rows in pages_rows.items() if rows is None)
+    if missing:
+        print(f"⚠️ {len(missing)} pages non extraites : {missing}")
+
+    df = merge_pages({page: rows for page, rows in pages_rows.items() if rows is not None})
+    df.attrs["pages_manquantes"] = missing
+    return df
+
+
+def crawl_sequential(done_pages: set, checkpoint_id: int | None = None) -> dict:
+    """
+    Extrait les pages dans l'ordre avec un seul navigateur, en sautant les pages
+    déjà présentes dans le point de reprise.
+    """
+    page = next_missing_page(0, done_pages)
+
+    PAGE_WAIT_TIMES.clear()
+    pages_rows = {}
+    driver = open_session(page)
+    restarts = 0
+
+    try:
+        while driver is not None:
+            # 4‑a. Lecture de la page courante (avec retries)
+            pages_rows[page] = read_page(driver, page, checkpoint_id)
+
+            # 4‑b. Pagination vers la prochaine page manquante (avec retries, puis redémarrage de session)
+            target = next_missing_page(page, done_pages)
+            try:
+                if target == page + 1:
+                    has_next = with_retries(
+                        lambda: next_page(driver, expected_page=target),
+                        driver,
+                        f"Passage à la page {target}",
+                    )
+                else:
+                    has_next = with_retries(
+                        lambda: goto_page(driver, target, current=page),
+                        driver,
+                        f"Accès à la page {target}",
+                    )
+            except WebDriverException as e:
+                if restarts >= MAX_SESSION_RESTARTS:
+                    raise
+                restarts += 1
+                print(f"🔄 Redémarrage de la session ({restarts}/{MAX_SESSION_RESTARTS}) : {e}")
+                driver.quit()
+                driver = open_session(target)
+                if driver is None:
+                    break
+                page = target
+                continue
+
+            if not has_next:
+                break
+            page = target
+    finally:
+        if driver is not None:
+            driver.quit()
+
+    report_wait_times()
+    return pages_rows
+
+
+def crawl_sharded(done_pages: set, workers: int, checkpoint_id: int | None = None) -> dict:
+    """
+    Répartit les pages restantes en `workers` plages contiguës et les extrait
+    dans des processus séparés (un navigateur headless chacun).
+    """
+    driver = open_session(1)
+    try:
+        total_pages = page_count(driver)
+    finally:
+        driver.quit()
+
+    if total_pages is None:
+        print("⚠️ Nombre de pages non confirmé : extraction séquentielle")
+        return crawl_sequential(done_pages, checkpoint_id)
+
+    remaining = [p for p in range(1, total_pages + 1) if p not in done_pages]
+    if not remaining:
+        return {}
+
+    shards = split_shards(remaining, workers)
+    print(f"🧩 {len(remaining)} pages réparties sur {len(shards)} sessions")
+
+    pages_rows, failed = {}, []
+    # 'spawn' : ne pas dupliquer les threads du scheduler ni les connexions SQLAlchemy
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+        futures = {pool.submit(crawl_pages, shard, checkpoint_id): shard for shard in shards}
+        for future in as_completed(futures):
+            shard = futures[future]
             try:
-                # 4‑a. Infos principales
-                title_element = ao.find("a", class_="DetailAO")
-                organization = (
-                    title_element.get_text(strip=True)
-                    if title_element
-                    else "Non spécifié"
-                )
-
-                # 4‑b. Détails (date, type, ville)
-                date_post, type_ao, city = extract_ao_details(ao)
-
-                # 4‑c. Attributs (n° ordre, n° AO, date limite…)
-                (
+                pages_rows.update(future.result())
+            except Exception as e:
+                print(f"⛔ Plage {shard[0]}–{shard[-1]} échouée : {e}")
+                failed.append(shard)
+
+    # Plage échouée : les pages déjà sauvegardées sont reprises du point de reprise,
+    # les autres sont rapportées comme manquantes (None), comme en extraction séquentielle
+    if failed:
+        saved = load_checkpoint_pages(checkpoint_id) if checkpoint_id else {}
+        for shard in failed:
+            for page in shard:
+                pages_rows.setdefault(page, saved.get(page))
+    return pages_rows
+
+
+def crawl_pages(pages: list, checkpoint_id: int | None = None) -> dict:
+    """Extrait une liste de pages triée avec un seul navigateur (exécuté dans un processus du pool)."""
+    PAGE_WAIT_TIMES.clear()
+    pages_rows = {}
+    driver = open_session(pages[0])
+    restarts = 0
+
+    try:
+        for i, page in enumerate(pages):
+            if driver is None:
+                break
+            if i > 0:
+                previous = pages[i - 1]
+                try:
+                    if page == previous + 1:
+                        reached = with_retries(
+                            lambda: next_page(driver, expected_page=page), driver, f"Passage à la page {page}"
+                        )
+                    else:
+                        reached = with_retries(
+                            lambda: goto_page(driver, page, current=previous), driver, f"Accès à la page {page}"
+                        )
+                except WebDriverException as e:
+                    if restarts >= MAX_SESSION_RESTARTS:
+                        raise
+                    restarts += 1
+                    print(f"🔄 Redémarrage de la session ({restarts}/{MAX_SESSION_RESTARTS}) : {e}")
+                    driver.quit()
+                    driver = open_session(page)
+                    reached = driver is not None
+                if not reached:
+                    break
+
+            pages_rows[page] = read_page(driver, page, checkpoint_id)
+    finally:
+        if driver is not None:
+            driver.quit()
+
+    report_wait_times()
+    return pages_rows
+
+
+def read_page(driver: webdriver.Chrome, page: int, checkpoint_id: int | None = None):
+    """
+    Extrait la page courante (avec retries) et la sauvegarde dans le point de reprise.
+    Retourne None si la page reste illisible : elle n'est pas sauvegardée, une reprise la relira.
+    """
+    try:
+        rows = with_retries(
+            lambda: parse_ao_cards(read_page_source(driver)),
+            driver,
+            f"Lecture de la page {page}",
+        )
+    except WebDriverException as e:
+        print(f"⛔ Page {page} ignorée après {MAX_PAGE_RETRIES} tentatives : {e}")
+        return None
+
+    if checkpoint_id:
+        save_checkpoint_page(checkpoint_id, page, rows)
+    return rows
+
+
+def next_missing_page(page: int, done_pages: set) -> int:
+    """Première page après `page` absente du point de reprise."""
+    page += 1
+    while page in done_pages:
+        page += 1
+    return page
+
+
+def default_workers() -> int:
+    return max(1, min(os.cpu_count() or 1, MAX_PARALLEL_SESSIONS))
+
+
+def split_shards(pages: list, workers: int) -> list:
+    """Découpe une liste de pages triée en au plus `workers` plages de tailles voisines."""
+    workers = max(1, min(workers, len(pages)))
+    size, extra = divmod(len(pages), workers)
+    shards, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(pages[start:end])
+        start = end
+    return shards
+
+
+def merge_pages(pages_rows: dict) -> pd.DataFrame:
+    """
+    Fusionne les AO de toutes les pages (dans l'ordre des pages) et supprime
+    les doublons (`Numéro d'ordre`, `Date de Poste`) : une AO publiée pendant
+    l'extraction décale les pages et peut apparaître deux fois.
+    """
+    ao_list = [ao for page in sorted(pages_rows) for ao in pages_rows[page]]
+    # Points de reprise enregistrés avant l'ajout du lien de détail
+    ao_list = [ao + [None] * (11 - len(ao)) for ao in ao_list]
+    df = convert_to_dataframe(ao_list)
+    before = len(df)
+    df = df.drop_duplicates(subset=["Numéro d'ordre", "Date de Poste"], keep="first")
+    if len(df) < before:
+        print(f"🧹 {before - len(df)} doublons supprimés lors de la fusion")
+    return df.reset_index(drop=True)
+
+
+def parse_ao_cards(page_source: str) -> list:
+    """Extrait les AO d'une page de résultats (une liste par AO)."""
+    soup = BeautifulSoup(page_source, "html.parser")
+    ao_cards = soup.find_all(
+        "div", class_="card card-dashed card-custom gutter-b"
+    )
+
+    ao_list = []
+    for ao in ao_cards:
+        try:
+            # Infos principales
+            title_element = ao.find("a", class_="DetailAO")
+            organization = (
+                title_element.get_text(strip=True)
+                if title_element
+                else "Non spécifié"
+            )
+
+            # Lien vers la page DetailAO (enrichissement)
+            detail_link = extract_ao_detail_link(title_element)
+
+            # Détails (date, type, ville)
+            date_post, type_ao, city = extract_ao_details(ao)
+
+            # Attributs (n° ordre, n° AO, date limite…)
+            (
+                num_ordre,
+                num_ao,
+                date_limit,
+                caution,
+                estimation,
+            ) = extract_ao_attributes(ao)
+
+            # Description
+            description = extract_ao_description(ao)
+
+            ao_list.append(
+                [
+                    organization,
+                    date_post,
+                    type_ao,
+                    city,
                     num_ordre,
                     num_ao,
                     date_limit,
                     caution,
                     estimation,
-                ) = extract_ao_attributes(ao)
-
-                # 4‑d. Description
-                description = extract_ao_description(ao)
-
-                ao_list.append(
-                    [
-                        organization,
-                        date_post,
-                        type_ao,
-                        city,
-                        num_ordre,
-                        num_ao,
-                        date_limit,
-                        caution,
-                        estimation,
-                        description,
-                    ]
-                )
+                    description,
+                    detail_link,
+                ]
+            )
 
-            except Exception as e:
-                print(f"⚠️ Erreur lors de l'extraction d'un AO : {e}")
+        except Exception as e:
+            print(f"⚠️ Erreur lors de l'extraction d'un AO : {e}")
 
-        # 4‑e. Pagination
-        if not next_page(driver):
-            break
-        clear_datatables_alert(driver)
+    return ao_list
 
-    driver.quit()
-    return convert_to_dataframe(ao_list)
+
+def read_page_source(driver: webdriver.Chrome) -> str:
+    """Attend que les cartes AO soient présentes puis retourne le HTML de la page."""
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.CLASS_NAME, "card-dashed"))
+    )
+    return driver.page_source
 
 
 # ----------------------------------------------------------------------
@@ -246,6 +655,14 @@ def extract_ao_attributes(ao):
     return num_ordre, num_ao, date_limit, caution, estimation
 
 
+def extract_ao_detail_link(title_element):
+    """URL absolue de la page DetailAO, ou None si la carte n'en a pas."""
+    href = title_element.get("href") if title_element else None
+    if not href or href.startswith(("#", "javascript:")):
+        return None
+    return urljoin(HOME_URL, href)
+
+
 def extract_ao_description(ao):
     description = "Non spécifié"
     description_element = ao.find(
@@ -257,20 +674,188 @@ def extract_ao_description(ao):
     return description
 
 
-def next_page(driver: webdriver.Chrome) -> bool:
-    """Clique sur 'Suivant' si présent, sinon termine la boucle."""
-    try:
-        next_button = driver.find_element(
-            By.XPATH,
-            "//a[contains(@onclick, 'getAoByPage') and i[contains(@class, 'ki-bold-arrow-next')]]",
-        )
-        driver.execute_script("arguments[0].click();", next_button)
-        time.sleep(3)
+NEXT_BUTTON_XPATH = "//a[contains(@onclick, 'getAoByPage') and i[contains(@class, 'ki-bold-arrow-next')]]"
+
+
+def next_page(driver: webdriver.Chrome, expected_page: int | None = None) -> bool:
+    """
+    Clique sur 'Suivant' si présent, sinon termine la boucle.
+
+    Attend ensuite que la nouvelle page soit réellement chargée (voir
+    `wait_for_page_load`). Si `expected_page` est déjà la page active (clic
+    précédent lent, puis nouvel essai), on attend sans recliquer pour ne pas
+    sauter de page.
+    """
+    install_xhr_tracker(driver)
+    previous_page = active_page_number(driver)
+
+    if expected_page is not None and previous_page == expected_page:
+        wait_for_page_load(driver, previous_page=None, first_card=None)
         return True
+
+    try:
+        next_button = driver.find_element(By.XPATH, NEXT_BUTTON_XPATH)
     except NoSuchElementException:
         print("✅ Extraction terminée.")
         return False
 
+    cards = driver.find_elements(By.CLASS_NAME, "card-dashed")
+    first_card = cards[0] if cards else None
+
+    driver.execute_script("arguments[0].click();", next_button)
+    wait_for_page_load(driver, previous_page, first_card)
+    return True
+
+
+def goto_page(driver: webdriver.Chrome, page: int, current: int | None = None) -> bool:
+    """
+    Se positionne sur la page `page`. Appelle directement `getAoByPage` (repris
+    de l'attribut onclick d'un lien de pagination) puis, si le numéro actif ne
+    correspond pas, avance page par page. Retourne False si la page n'existe pas.
+
+    `current` est la page où l'appelant sait se trouver (1 juste après la
+    connexion), utilisée quand la pagination n'affiche pas de numéro actif
+    lisible. Sans l'un ni l'autre, lève WebDriverException plutôt que de deviner.
+    """
+    install_xhr_tracker(driver)
+    current = active_page_number(driver) or current
+    if current is None:
+        raise WebDriverException(f"Page active inconnue : accès à la page {page} impossible")
+    if current == page:
+        return True
+
+    if current + 1 != page:
+        links = driver.find_elements(By.XPATH, "//a[contains(@onclick, 'getAoByPage')]")
+        onclick = links[0].get_attribute("onclick") if links else None
+        if onclick and re.search(r"getAoByPage\(\s*\d+", onclick):
+            cards = driver.find_elements(By.CLASS_NAME, "card-dashed")
+            driver.execute_script(
+                re.sub(r"getAoByPage\(\s*\d+", f"getAoByPage({page}", onclick, count=1)
+            )
+            wait_for_page_load(driver, current, cards[0] if cards else None)
+            reached = active_page_number(driver)
+            # Numéro actif illisible : on retient la page demandée à getAoByPage
+            if reached is None or reached == page:
+                return True
+            current = reached
+
+    # Repli : avancer page par page (impossible de reculer)
+    if current > page:
+        raise WebDriverException(f"Page {current} atteinte au lieu de la page {page}")
+    while current < page:
+        if not next_page(driver, expected_page=current + 1):
+            return False
+        current += 1
+    return True
+
+
+def page_count(driver: webdriver.Chrome):
+    """
+    Nombre total de pages, déduit des liens de pagination `getAoByPage(n)`.
+
+    La pagination peut n'afficher qu'une fenêtre de pages : on se place sur le
+    plus grand numéro visible jusqu'à ce qu'il n'y ait plus de flèche 'Suivant'.
+    Retourne None si le total ne peut pas être confirmé.
+    """
+    known = 1  # appelé juste après open_session(1)
+    while True:
+        current = active_page_number(driver) or known
+        numbers = [current]
+        for link in driver.find_elements(By.XPATH, "//a[contains(@onclick, 'getAoByPage')]"):
+            numbers += [int(n) for n in re.findall(r"getAoByPage\(\s*(\d+)", link.get_attribute("onclick") or "")]
+        total = max(numbers)
+
+        if total == current:
+            return None if driver.find_elements(By.XPATH, NEXT_BUTTON_XPATH) else total
+        if not with_retries(
+            lambda: goto_page(driver, total, current=current), driver, f"Accès à la page {total}"
+        ):
+            return None
+        known = total
+
+
+# ----------------------------------------------------------------------
+# 5 bis.  Attente adaptative des changements de page
+# ----------------------------------------------------------------------
+# Compte les requêtes getAoByPage en cours (l'URL est retenue par open()) : les
+# autres XHR de la page (suivi, notifications) ne bloquent pas l'attente.
+# Installé une seule fois par chargement complet : la pagination remplace le
+# contenu sans recharger.
+XHR_TRACKER_JS = """
+if (!window.__aoXhr) {
+    window.__aoXhr = {pending: 0};
+    const open = XMLHttpRequest.prototype.open;
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__aoUrl = String(url);
+        return open.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.send = function () {
+        if (this.__aoUrl && this.__aoUrl.includes("getAoByPage")) {
+            window.__aoXhr.pending++;
+            this.addEventListener("loadend", () => { window.__aoXhr.pending--; });
+        }
+        return send.apply(this, arguments);
+    };
+}
+"""
+
+ACTIVE_PAGE_JS = """
+const el = document.querySelector(
+    ".pagination .active, .datatable-pager-link-active, a.active[onclick*='getAoByPage']"
+);
+return el ? el.textContent.trim() : null;
+"""
+
+# Durées d'attente (s) de chaque changement de page de l'extraction en cours
+PAGE_WAIT_TIMES = []
+
+
+def install_xhr_tracker(driver: webdriver.Chrome) -> None:
+    driver.execute_script(XHR_TRACKER_JS)
+
+
+def active_page_number(driver: webdriver.Chrome):
+    """Numéro de la page active dans la pagination, ou None s'il est illisible."""
+    label = driver.execute_script(ACTIVE_PAGE_JS)
+    try:
+        return int(label)
+    except (TypeError, ValueError):
+        return None
+
+
+def wait_for_page_load(driver: webdriver.Chrome, previous_page, first_card) -> None:
+    """
+    Attend la fin d'un changement de page :
+    - plus aucune requête getAoByPage en cours (réponse reçue),
+    - ancienne première carte détachée du DOM ou numéro de page actif modifié,
+    - nouvelles cartes AO présentes.
+    Lève TimeoutException après `PAGE_LOAD_TIMEOUT` secondes.
+    """
+    start = time.perf_counter()
+
+    def page_changed(driver):
+        clear_datatables_alert(driver, timeout=0)
+        if driver.execute_script("return window.__aoXhr ? window.__aoXhr.pending : 0;"):
+            return False
+        if first_card is not None or previous_page is not None:
+            stale = first_card is not None and EC.staleness_of(first_card)(driver)
+            moved = previous_page is not None and active_page_number(driver) not in (None, previous_page)
+            if not (stale or moved):
+                return False
+        return bool(driver.find_elements(By.CLASS_NAME, "card-dashed"))
+
+    WebDriverWait(driver, PAGE_LOAD_TIMEOUT, poll_frequency=PAGE_POLL_INTERVAL).until(page_changed)
+    PAGE_WAIT_TIMES.append(time.perf_counter() - start)
+
+
+def report_wait_times() -> None:
+    if PAGE_WAIT_TIMES:
+        print(
+            f"⏱️ Attente par page : moyenne {sum(PAGE_WAIT_TIMES) / len(PAGE_WAIT_TIMES):.2f}s, "
+            f"max {max(PAGE_WAIT_TIMES):.2f}s sur {len(PAGE_WAIT_TIMES)} pages"
+        )
+
 
 # ----------------------------------------------------------------------
 # 6.  Conversion finale en DataFrame
@@ -289,5 +874,189 @@ def convert_to_dataframe(ao_list):
             "Caution",
             "Estimation",
             "Description",
+            "Lien détail",
         ],
     )
+
+
+# ----------------------------------------------------------------------
+# 7.  Enrichissement : pages DetailAO (pièces jointes, lots, acheteur)
+# ----------------------------------------------------------------------
+# Champs de la carte dont la modification justifie de relire la page de détail
+CARD_HASH_COLUMNS = [
+    "Organisme", "Date de Poste", "Type d'AO", "Ville", "Numéro d'ordre",
+    "Numéro AO", "Date Limite", "Caution", "Estimation", "Description", "Lien détail",
+]
+ATTACHMENT_EXTENSIONS = (".pdf", ".zip", ".rar", ".doc", ".docx", ".xls", ".xlsx")
+AUTHORITY_LABELS = ("acheteur", "maître d'ouvrage", "maitre d'ouvrage", "autorité", "organisme")
+DETAIL_TIMEOUT = 15  # secondes
+
+
+def enrich_aos(df: pd.DataFrame) -> dict:
+    """
+    Récupère les pages DetailAO des AO nouvelles ou modifiées et enregistre le
+    résultat dans `ao_details`.
+
+    Un cache disque (`DETAIL_CACHE_DIR`) indexé par (N° d'ordre, date de poste)
+    conserve l'empreinte de la carte et du détail : une AO dont la carte n'a pas
+    changé et dont le détail est bien en base n'est pas relue, et un détail
+    identique à celui de `ao_details` n'est pas réécrit. Le cache n'est mis à
+    jour qu'une fois les détails enregistrés.
+    Les pages sont téléchargées en parallèle (`DETAIL_WORKERS` au plus, dans la
+    limite de `MAX_PARALLEL_SESSIONS`) avec les cookies de la session Selenium
+    enregistrée. Une session expirée interrompt l'enrichissement.
+    """
+    stats = {"cached": 0, "fetched": 0, "updated": 0, "failed": 0}
+    if df is None or df.empty or "id" not in df.columns or "Lien détail" not in df.columns:
+        return stats
+
+    cookie_header = session_cookie_header()
+    if cookie_header is None:
+        print("⚠️ Enrichissement ignoré : aucune session enregistrée")
+        return stats
+
+    rows = df[df["id"].notna() & df["Lien détail"].fillna("").astype(bool)]
+    stored = load_detail_hashes([int(ao_id) for ao_id in rows["id"]])
+
+    # AO à relire : carte absente du cache ou modifiée, ou détail absent de la base
+    todo = []
+    for _, row in rows.iterrows():
+        key = detail_cache_key(row["Numéro d'ordre"], row["Date de Poste"])
+        card_hash = content_hash([row.get(col) for col in CARD_HASH_COLUMNS])
+        cached = read_detail_cache(key)
+        if cached and cached["card_hash"] == card_hash and stored.get(int(row["id"])) == cached.get("detail_hash"):
+            stats["cached"] += 1
+            continue
+        todo.append((row, key, card_hash))
+
+    records, cache_entries = [], []
+    # Même plafond de connexions simultanées au portail que l'extraction
+    with ThreadPoolExecutor(max_workers=max(1, min(DETAIL_WORKERS, MAX_PARALLEL_SESSIONS))) as pool:
+        futures = {
+            pool.submit(fetch_detail, row["Lien détail"], cookie_header): (row, key, card_hash)
+            for row, key, card_hash in todo
+        }
+        for future in as_completed(futures):
+            row, key, card_hash = futures[future]
+            try:
+                detail = parse_ao_detail(future.result())
+            except PermissionError as e:
+                # Session expirée : toutes les requêtes suivantes échoueraient aussi
+                print(f"⛔ Enrichissement interrompu : {e}")
+                for pending in futures:
+                    pending.cancel()
+                stats["failed"] += 1 + sum(1 for pending in futures if pending.cancelled())
+                break
+            except (OSError, HTTPException) as e:  # URLError, délai dépassé, réponse tronquée
+                numero = row["Numéro d'ordre"]
+                print(f"⚠️ Détail de l'AO {numero} indisponible : {e}")
+                stats["failed"] += 1
+                continue
+
+            stats["fetched"] += 1
+            detail_hash = content_hash(detail)
+            cache_entries.append((key, {"card_hash": card_hash, "detail_hash": detail_hash}))
+            if stored.get(int(row["id"])) == detail_hash:
+                continue
+            records.append({
+                "ao_id": int(row["id"]),
+                "numero_ordre": row["Numéro d'ordre"],
+                "date_poste": None if pd.isna(row["Date de Poste"]) else row["Date de Poste"],
+                "content_hash": detail_hash,
+                **detail,
+            })
+
+    stats["updated"] = save_ao_details(records) if records else 0
+    # Après l'enregistrement : un échec en base ne doit pas marquer l'AO comme traitée
+    for key, entry in cache_entries:
+        write_detail_cache(key, entry)
+    print(
+        f"📎 Enrichissement : {stats['fetched']} pages lues, {stats['cached']} en cache, "
+        f"{stats['updated']} détails enregistrés, {stats['failed']} échecs"
+    )
+    return stats
+
+
+def session_cookie_header():
+    """En-tête Cookie construit depuis `SESSION_FILE`, ou None sans session."""
+    try:
+        cookies = json.loads(SESSION_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return "; ".join(f"{c['name']}={c['value']}" for c in cookies) or None
+
+
+def fetch_detail(url: str, cookie_header: str) -> str:
+    """Télécharge une page DetailAO (avec retries), PermissionError si la session a expiré."""
+    for attempt in range(1, MAX_PAGE_RETRIES + 1):
+        try:
+            request = Request(url, headers={"Cookie": cookie_header, "User-Agent": "Mozilla/5.0"})
+            with urlopen(request, timeout=DETAIL_TIMEOUT) as response:
+                page = response.read().decode(response.headers.get_content_charset() or "utf-8", errors="replace")
+            if 'name="username"' in page:
+                raise PermissionError("session expirée")
+            return page
+        except URLError:
+            if attempt == MAX_PAGE_RETRIES:
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+
+
+def parse_ao_detail(page_source: str) -> dict:
+    """Acheteur, lots (tableaux contenant une colonne « Lot »), pièces jointes et champs libellé/valeur."""
+    soup = BeautifulSoup(page_source, "html.parser")
+
+    # Paires libellé / valeur, sur le modèle des attributs des cartes
+    fields = {}
+    for label in soup.find_all("span", class_="font-weight-bolder"):
+        value = label.find_next_sibling("span")
+        if value:
+            fields[label.get_text(strip=True).rstrip(" :")] = value.get_text(" ", strip=True)
+
+    authority = next(
+        (v for k, v in fields.items() if any(l in k.lower() for l in AUTHORITY_LABELS)),
+        None,
+    )
+
+    lots = []
+    for table in soup.find_all("table"):
+        headers = [th.get_text(strip=True) for th in table.find_all("th")]
+        if not any("lot" in h.lower() for h in headers):
+            continue
+        for tr in table.find_all("tr"):
+            cells = [td.get_text(" ", strip=True) for td in tr.find_all("td")]
+            if cells:
+                lots.append(dict(zip(headers, cells)))
+
+    attachments = []
+    for link in soup.find_all("a", href=True):
+        href = link["href"]
+        if href.lower().split("?")[0].endswith(ATTACHMENT_EXTENSIONS) or "telecharger" in href.lower():
+            attachments.append({"nom": link.get_text(strip=True), "url": urljoin(HOME_URL, href)})
+
+    return {"acheteur": authority, "lots": lots, "pieces_jointes": attachments, "champs": fields}
+
+
+def content_hash(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def detail_cache_key(numero_ordre, date_poste) -> str:
+    return hashlib.sha1(f"{numero_ordre}|{date_poste}".encode("utf-8")).hexdigest()
+
+
+def detail_cache_path(key: str):
+    return DETAIL_CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def read_detail_cache(key: str):
+    try:
+        return json.loads(detail_cache_path(key).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_detail_cache(key: str, entry: dict) -> None:
+    path = detail_cache_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(entry), encoding="utf-8")
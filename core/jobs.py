@@ -1,27 +1,55 @@
 # core/jobs.py
 import streamlit as st
-from core.extract import extract_aos
+from core.extract import extract_aos, enrich_aos
+from core.dedup import apply_duplicate_groups
 from db.queries import save_and_mark_new
 from db.queries import update_last_scraping_meta_data
+from db.queries import start_crawl_checkpoint, complete_crawl_checkpoint, fail_crawl_checkpoint
 
-def run_scraping_job(use_streamlit=True):
+def run_scraping_job(use_streamlit=True, resume=False, workers=None):
+    checkpoint = None
     try:
-        df_extracted = extract_aos()
+        # Point de reprise : nouvelle extraction ou reprise de la dernière interrompue
+        checkpoint = start_crawl_checkpoint(resume=resume)
+        df_extracted = extract_aos(checkpoint, workers=workers)
+        missing_pages = df_extracted.attrs.get("pages_manquantes", [])
         print(df_extracted.columns)
         df = save_and_mark_new(df_extracted)
         print(df.columns)
+        try:
+            df = apply_duplicate_groups(df)
+        except Exception as e:
+            print(f"⚠️ Déduplication impossible : {e}")
+        try:
+            enrich_aos(df)
+        except Exception as e:
+            print(f"⚠️ Enrichissement impossible : {e}")
         num_new_ao = len(df[df['is_new'] == True])
+        if missing_pages:
+            # Point de reprise conservé : une reprise ne relira que les pages manquantes
+            fail_crawl_checkpoint(checkpoint["id"], f"Pages non extraites : {missing_pages}")
+            if use_streamlit:
+                st.warning(f"⚠️ {len(missing_pages)} pages non extraites : relancez avec la reprise activée.")
+        else:
+            complete_crawl_checkpoint(checkpoint["id"])
 
-        # Sauvegarde des métadonnées
+        # Sauvegarde des métadonnées. Extraction partielle : date de dernier scraping inchangée,
+        # pour que les AO des pages récupérées à la reprise soient encore comptées comme nouvelles
         st.session_state["ao_data"] = df
         st.session_state["num_new_ao"] = num_new_ao
-        update_last_scraping_meta_data(num_new_ao)
+        if not missing_pages:
+            update_last_scraping_meta_data(num_new_ao)
         if use_streamlit:
             st.success(f"✅ {num_new_ao} nouveaux appels d'offres détectés et enregistrés.")
 
         return df, num_new_ao
 
     except Exception as e:
+        if checkpoint:
+            try:
+                fail_crawl_checkpoint(checkpoint["id"], str(e))
+            except Exception as checkpoint_error:
+                print(f"[ERREUR] Mise à jour du point de reprise impossible : {checkpoint_error}")
         if use_streamlit:
             st.error(f"❌ Une erreur est survenue : {e}")
         else:
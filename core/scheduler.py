@@ -4,6 +4,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 import logging
 import datetime
 from core.jobs import run_scraping_job
+from db.queries import archive_old_partitions
 
 logging.basicConfig(level=logging.INFO)
 
@@ -58,6 +59,13 @@ def job_scraping():
     except Exception as e:
         logging.error(f"Erreur lors du scraping : {e}")
 
+    try:
+        archived = archive_old_partitions()
+        if archived:
+            logging.info(f"{len(archived)} partitions archivées : {', '.join(archived)}")
+    except Exception as e:
+        logging.error(f"Erreur lors de l'archivage : {e}")
+
 def schedule_job():
     row = get_config()
     if row:
@@ -1,3 +1,4 @@
+import json
 import logging
 from db.database import engine
 from sqlalchemy import text
@@ -5,7 +6,11 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 
-from db.utils import ensure_tables, force_utf8, _to_datetime_series, COL_MAP, inverse_map
+from db.utils import (
+    ensure_tables, ensure_month_partitions, force_utf8, _to_datetime_series,
+    _known_partitions, COL_MAP, inverse_map,
+)
+from utils.config import ARCHIVE_DIR, RETENTION_MONTHS
 from sqlalchemy.exc import IntegrityError
 import traceback
 
@@ -26,17 +31,100 @@ def update_last_scraping_meta_data(num_new_ao: int):
             {"ts": ts, "num_new_ao": num_new_ao}
         )
 
-# 6) Save + marquage is_new (en mémoire uniquement)
-def save_and_mark_new(df: pd.DataFrame, table_name: str = "appels_offres") -> pd.DataFrame:
+# Points de reprise : création ou reprise d'une extraction
+def start_crawl_checkpoint(resume: bool = False) -> dict:
     """
-    - Renomme les colonnes selon COL_MAP
-    - Convertit les dates
-    - Calcule is_new = date_poste > last_scraping_date (en mémoire, pas en base)
-    - Insère en base avec ON CONFLICT (numero_ordre, date_poste)
-    - Retourne uniquement les lignes is_new=True
+    Retourne {"id"} du point de reprise à utiliser.
+    Avec `resume=True`, reprend la dernière extraction non terminée si elle existe.
+    Sinon, les extractions non terminées sont abandonnées et leurs pages supprimées.
     """
     ensure_tables()
+    ts = datetime.now()
+    with engine.begin() as conn:
+        if resume:
+            row = conn.execute(
+                text("""
+                    SELECT id FROM scraping_checkpoints
+                    WHERE status IN ('running', 'failed')
+                    ORDER BY id DESC LIMIT 1
+                """)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    text("UPDATE scraping_checkpoints SET status = 'running', updated_at = :ts WHERE id = :id"),
+                    {"ts": ts, "id": row[0]}
+                )
+                return {"id": row[0]}
+
+        conn.execute(
+            text("""
+                DELETE FROM scraping_checkpoint_pages WHERE checkpoint_id IN (
+                    SELECT id FROM scraping_checkpoints WHERE status IN ('running', 'failed')
+                )
+            """)
+        )
+        conn.execute(
+            text("UPDATE scraping_checkpoints SET status = 'abandoned', updated_at = :ts WHERE status IN ('running', 'failed')"),
+            {"ts": ts}
+        )
+
+        row = conn.execute(
+            text("""
+                INSERT INTO scraping_checkpoints (status, started_at, updated_at)
+                VALUES ('running', :ts, :ts)
+                RETURNING id
+            """),
+            {"ts": ts}
+        ).fetchone()
+        return {"id": row[0]}
+
+# Sauvegarde d'une page extraite dans le point de reprise
+def save_checkpoint_page(checkpoint_id: int, page: int, rows: list):
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO scraping_checkpoint_pages (checkpoint_id, page, rows)
+                VALUES (:checkpoint_id, :page, CAST(:rows AS JSONB))
+                ON CONFLICT (checkpoint_id, page) DO UPDATE SET rows = EXCLUDED.rows
+            """),
+            {"checkpoint_id": checkpoint_id, "page": page, "rows": json.dumps(rows, ensure_ascii=False)}
+        )
+        conn.execute(
+            text("UPDATE scraping_checkpoints SET updated_at = :ts WHERE id = :id"),
+            {"ts": datetime.now(), "id": checkpoint_id}
+        )
+
+# Lecture des AO déjà extraits pour un point de reprise : {page: [AO, ...]}
+def load_checkpoint_pages(checkpoint_id: int) -> dict:
+    with engine.connect() as conn:
+        result = conn.execute(
+            text("SELECT page, rows FROM scraping_checkpoint_pages WHERE checkpoint_id = :id"),
+            {"id": checkpoint_id}
+        )
+        return {page: rows for page, rows in result}
+
+# Clôture du point de reprise : les lots partiels ne sont plus nécessaires
+def complete_crawl_checkpoint(checkpoint_id: int):
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE scraping_checkpoints SET status = 'completed', updated_at = :ts WHERE id = :id"),
+            {"ts": datetime.now(), "id": checkpoint_id}
+        )
+        conn.execute(
+            text("DELETE FROM scraping_checkpoint_pages WHERE checkpoint_id = :id"),
+            {"id": checkpoint_id}
+        )
+
+# Echec : le point de reprise reste disponible pour une reprise ultérieure
+def fail_crawl_checkpoint(checkpoint_id: int, error: str):
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE scraping_checkpoints SET status = 'failed', error = :error, updated_at = :ts WHERE id = :id"),
+            {"error": error, "ts": datetime.now(), "id": checkpoint_id}
+        )
 
+# Normalisation : colonnes de la base, dates et montants convertis
+def normalize_aos(df: pd.DataFrame) -> pd.DataFrame:
     # Harmoniser les colonnes
     df = df.rename(columns=COL_MAP)
 
@@ -59,6 +147,31 @@ def save_and_mark_new(df: pd.DataFrame, table_name: str = "appels_offres") -> pd
     if "marche" in df.columns:
         df["marche"] = df["marche"].fillna("Non spécifié")
 
+    return df
+
+# 6) Save + marquage is_new (en mémoire uniquement)
+def save_and_mark_new(df: pd.DataFrame, table_name: str = "appels_offres") -> pd.DataFrame:
+    """
+    - Renomme les colonnes selon COL_MAP
+    - Convertit les dates
+    - Calcule is_new = date_poste > last_scraping_date (en mémoire, pas en base)
+    - Insère en base avec ON CONFLICT (numero_ordre, date_poste)
+    - Retourne uniquement les lignes is_new=True
+    """
+    ensure_tables()
+
+    df = normalize_aos(df)
+
+    # AO des mois déjà archivés : ne pas recréer leurs partitions (l'archive existe)
+    cutoff = retention_cutoff()
+    expired = df["date_poste"] < cutoff
+    if expired.any():
+        print(f"🗄️ {int(expired.sum())} AO antérieures au {cutoff:%d/%m/%Y} ignorées (période archivée)")
+        df = df[~expired].copy()
+
+    # Partitions mensuelles nécessaires à l'insertion
+    ensure_month_partitions(df["date_poste"])
+
     # Calcul de is_new par rapport à la dernière date de scraping
     df = calculate_is_new(df)
 
@@ -68,12 +181,12 @@ def save_and_mark_new(df: pd.DataFrame, table_name: str = "appels_offres") -> pd
         INSERT INTO {table_name} (
             organisme, date_poste, type_offre, ville, numero_ordre,
             numero_ao, date_limite, caution, estimation, description,
-            marche
+            marche, lien_detail
         )
         VALUES (
             :organisme, :date_poste, :type_offre, :ville, :numero_ordre,
             :numero_ao, :date_limite, :caution, :estimation, :description,
-            :marche
+            :marche, :lien_detail
         )
         ON CONFLICT (numero_ordre, date_poste)
         DO UPDATE SET
@@ -85,15 +198,26 @@ def save_and_mark_new(df: pd.DataFrame, table_name: str = "appels_offres") -> pd
             caution     = EXCLUDED.caution,
             estimation  = EXCLUDED.estimation,
             description = EXCLUDED.description,
-            marche      = EXCLUDED.marche;
+            marche      = EXCLUDED.marche,
+            lien_detail = EXCLUDED.lien_detail,
+            -- Texte modifié : le groupe de doublons sera recalculé
+            groupe_id   = CASE
+                WHEN {table_name}.organisme IS DISTINCT FROM EXCLUDED.organisme
+                  OR {table_name}.description IS DISTINCT FROM EXCLUDED.description
+                THEN NULL
+                ELSE {table_name}.groupe_id
+            END
+        RETURNING id;
     """
 
-    # Insertion ligne par ligne
+    # Insertion ligne par ligne (ids conservés pour la déduplication)
+    ids = []
     try:
         with engine.begin() as conn:
             for _, row in df.iterrows():
                 data = {k: force_utf8(v) for k, v in row.to_dict().items() if k in COL_MAP.values()}
-                conn.execute(text(insert_sql), data)
+                ids.append(conn.execute(text(insert_sql), data).scalar())
+        df["id"] = ids
     except IntegrityError as e:
         print("\n⛔ IntegrityError:", e)
         print(traceback.format_exc())
@@ -102,13 +226,125 @@ def save_and_mark_new(df: pd.DataFrame, table_name: str = "appels_offres") -> pd
 
     return df
 
-def load_last_scraping_results() -> pd.DataFrame:
+# Enregistrement des détails d'AO (enrichissement) : seules les lignes au contenu modifié sont réécrites,
+# retourne le nombre de lignes insérées ou mises à jour
+def save_ao_details(records: list) -> int:
+    ensure_tables()
+    ts = datetime.now()
+    rows = [
+        {
+            **record,
+            "lots": json.dumps(record.get("lots"), ensure_ascii=False),
+            "pieces_jointes": json.dumps(record.get("pieces_jointes"), ensure_ascii=False),
+            "champs": json.dumps(record.get("champs"), ensure_ascii=False),
+            "fetched_at": ts,
+        }
+        for record in records
+    ]
+    updated = 0
+    with engine.begin() as conn:
+        for row in rows:
+            updated += conn.execute(
+                text("""
+                    INSERT INTO ao_details (
+                        ao_id, numero_ordre, date_poste, content_hash, acheteur,
+                        lots, pieces_jointes, champs, fetched_at
+                    )
+                    VALUES (
+                        :ao_id, :numero_ordre, :date_poste, :content_hash, :acheteur,
+                        CAST(:lots AS JSONB), CAST(:pieces_jointes AS JSONB), CAST(:champs AS JSONB), :fetched_at
+                    )
+                    ON CONFLICT (ao_id) DO UPDATE SET
+                        numero_ordre   = EXCLUDED.numero_ordre,
+                        date_poste     = EXCLUDED.date_poste,
+                        content_hash   = EXCLUDED.content_hash,
+                        acheteur       = EXCLUDED.acheteur,
+                        lots           = EXCLUDED.lots,
+                        pieces_jointes = EXCLUDED.pieces_jointes,
+                        champs         = EXCLUDED.champs,
+                        fetched_at     = EXCLUDED.fetched_at
+                    WHERE ao_details.content_hash <> EXCLUDED.content_hash
+                """),
+                row
+            ).rowcount
+    return updated
+
+# Empreintes des détails déjà enregistrés : {ao_id: content_hash}
+def load_detail_hashes(ao_ids: list) -> dict:
+    if not ao_ids:
+        return {}
+    ensure_tables()
     with engine.connect() as conn:
-        df = pd.read_sql_table("appels_offres", conn)
+        result = conn.execute(
+            text("SELECT ao_id, content_hash FROM ao_details WHERE ao_id = ANY(:ids)"),
+            {"ids": list(ao_ids)}
+        )
+        return {ao_id: content_hash for ao_id, content_hash in result}
+
+def load_last_scraping_results(months: int | None = None) -> pd.DataFrame:
+    """
+    Charge les AO depuis la base. Avec `months`, seules les AO postées depuis le
+    début du mois, `months` mois en arrière, sont lues : les partitions plus
+    anciennes ne sont pas parcourues.
+    """
+    with engine.connect() as conn:
+        if months is None:
+            df = pd.read_sql_table("appels_offres", conn)
+        else:
+            since = (pd.Timestamp.now().to_period("M") - months).start_time
+            # Les AO sans date (partition par défaut) restent affichées
+            df = pd.read_sql(
+                text("SELECT * FROM appels_offres WHERE date_poste >= :since OR date_poste IS NULL"),
+                conn,
+                params={"since": since.to_pydatetime()},
+            )
         df = calculate_is_new(df)
         df = df.rename(columns=inverse_map)
         return df
 
+# Début de la période conservée en base : les mois antérieurs sont archivés
+def retention_cutoff(retention_months: int = RETENTION_MONTHS) -> pd.Timestamp:
+    return (pd.Timestamp.now().to_period("M") - retention_months).start_time
+
+# Archivage des partitions au-delà de la rétention : export CSV.gz, détachement, suppression
+def archive_old_partitions(retention_months: int = RETENTION_MONTHS, archive_dir=ARCHIVE_DIR) -> list:
+    cutoff = retention_cutoff(retention_months)
+    archived = []
+
+    with engine.connect() as conn:
+        partitions = conn.execute(
+            text("""
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                JOIN pg_class p ON p.oid = i.inhparent
+                WHERE p.relname = 'appels_offres' AND c.relname ~ '^appels_offres_[0-9]{4}_[0-9]{2}$'
+                ORDER BY c.relname
+            """)
+        ).scalars().all()
+
+    for name in partitions:
+        year, month = int(name[-7:-3]), int(name[-2:])
+        month_end = (pd.Period(year=year, month=month, freq="M") + 1).start_time
+        if month_end > cutoff:
+            continue
+
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        # Horodaté : une archive existante n'est jamais écrasée
+        path = archive_dir / f"{name}_{datetime.now():%Y%m%d_%H%M%S}.csv.gz"
+        with engine.begin() as conn:
+            pd.read_sql_table(name, conn).to_csv(path, index=False, compression="gzip")
+            conn.execute(text(f"ALTER TABLE appels_offres DETACH PARTITION {name};"))
+            # Index de déduplication : les AO archivées ne sont plus candidates
+            conn.execute(text(f"DELETE FROM ao_lsh_bands WHERE ao_id IN (SELECT id FROM {name});"))
+            conn.execute(text(f"DELETE FROM ao_minhash WHERE ao_id IN (SELECT id FROM {name});"))
+            conn.execute(text(f"DELETE FROM ao_details WHERE ao_id IN (SELECT id FROM {name});"))
+            conn.execute(text(f"DROP TABLE {name};"))
+        _known_partitions.discard(name)
+        archived.append(name)
+        logging.info(f"Partition {name} archivée dans {path}")
+
+    return archived
+
 def calculate_is_new(df: pd.DataFrame) -> pd.DataFrame:
     last_scraping_date = get_last_scraping_date()
     if last_scraping_date is None:
@@ -116,4 +352,10 @@ def calculate_is_new(df: pd.DataFrame) -> pd.DataFrame:
         logging.info("Aucune date de dernier scraping trouvée. Tous les AO sont marqués comme nouveaux.")
     else:
         df["is_new"] = df["date_poste"] > last_scraping_date
+    return mark_republished(df)
+
+def mark_republished(df: pd.DataFrame) -> pd.DataFrame:
+    """Une republication (AO rattachée au groupe d'une AO plus ancienne) n'est pas nouvelle."""
+    if "is_new" in df.columns and "groupe_id" in df.columns and "id" in df.columns:
+        df["is_new"] = df["is_new"] & (df["groupe_id"].isna() | (df["groupe_id"] == df["id"]))
     return df
\ No newline at end of file
@@ -15,17 +15,28 @@ COL_MAP = {
     "Estimation": "estimation",
     "Description": "description",
     "Marché": "marche",
+    "Lien détail": "lien_detail",
 }
 
 # Inverse mapping
 inverse_map = {v: k for k, v in COL_MAP.items()}
 
+# Partitions mensuelles de appels_offres déjà créées (évite du DDL à chaque écriture)
+_known_partitions = set()
+
 # Création des tables si elles n'existent pas
 def ensure_tables():
     with engine.begin() as conn:
+        # Ancienne table non partitionnée : mise de côté puis recopiée plus bas
+        legacy = _table_exists(conn, "appels_offres") and not _is_partitioned(conn, "appels_offres")
+        if legacy:
+            _set_aside_legacy_table(conn)
+
+        # Table partitionnée par mois de date_poste. Une clé primaire devrait inclure
+        # date_poste, qui peut être NULL : id est donc seulement indexé.
         conn.execute(text("""
         CREATE TABLE IF NOT EXISTS appels_offres (
-            id BIGSERIAL PRIMARY KEY,
+            id BIGSERIAL NOT NULL,
             organisme     TEXT,
             date_poste    TIMESTAMP,
             type_offre    TEXT,
@@ -37,7 +48,58 @@ def ensure_tables():
             estimation    NUMERIC,
             description   TEXT,
             marche        TEXT,
+            groupe_id     BIGINT,
+            lien_detail   TEXT,
             UNIQUE (numero_ordre, date_poste)
+        ) PARTITION BY RANGE (date_poste);
+        """))
+        # AO sans date de poste
+        conn.execute(text("CREATE TABLE IF NOT EXISTS appels_offres_default PARTITION OF appels_offres DEFAULT;"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS appels_offres_id_idx ON appels_offres (id);"))
+        # Migration unique (table partitionnée créée avant lien_detail) : ALTER TABLE verrouille
+        # toute la table et ses partitions, il n'est lancé que si la colonne manque
+        if not _column_exists(conn, "appels_offres", "lien_detail"):
+            conn.execute(text("ALTER TABLE appels_offres ADD COLUMN lien_detail TEXT;"))
+
+        # Groupe de quasi-doublons (voir core/dedup.py) : id de la plus ancienne AO du groupe
+        conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS appels_offres_groupe_a_calculer_idx
+            ON appels_offres (id) WHERE groupe_id IS NULL;
+        """))
+
+        if legacy:
+            _copy_legacy_table(conn)
+
+        # Index LSH : signature MinHash et buckets par bande de chaque AO
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS ao_minhash (
+            ao_id     BIGINT PRIMARY KEY,
+            signature BYTEA NOT NULL
+        );
+        """))
+
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS ao_lsh_bands (
+            bucket BIGINT NOT NULL,
+            band   SMALLINT NOT NULL,
+            ao_id  BIGINT NOT NULL,
+            PRIMARY KEY (bucket, band, ao_id)
+        );
+        """))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ao_lsh_bands_ao_id_idx ON ao_lsh_bands (ao_id);"))
+
+        # Détail des AO (page DetailAO) : une ligne par AO enrichie
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS ao_details (
+            ao_id          BIGINT PRIMARY KEY,
+            numero_ordre   TEXT,
+            date_poste     TIMESTAMP,
+            content_hash   TEXT NOT NULL,
+            acheteur       TEXT,
+            lots           JSONB,
+            pieces_jointes JSONB,
+            champs         JSONB,
+            fetched_at     TIMESTAMP NOT NULL
         );
         """))
 
@@ -48,6 +110,115 @@ def ensure_tables():
         );
         """))
 
+        # Points de reprise des extractions (une ligne par exécution)
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS scraping_checkpoints (
+            id SERIAL PRIMARY KEY,
+            status      TEXT NOT NULL DEFAULT 'running',
+            started_at  TIMESTAMP NOT NULL,
+            updated_at  TIMESTAMP NOT NULL,
+            error       TEXT
+        );
+        """))
+
+        # Lots partiels : les AO extraits de chaque page terminée
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS scraping_checkpoint_pages (
+            checkpoint_id INTEGER NOT NULL REFERENCES scraping_checkpoints(id) ON DELETE CASCADE,
+            page          INTEGER NOT NULL,
+            rows          JSONB NOT NULL,
+            PRIMARY KEY (checkpoint_id, page)
+        );
+        """))
+
+def _table_exists(conn, table: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": table}).scalar()
+
+def _column_exists(conn, table: str, column: str) -> bool:
+    return conn.execute(
+        text("""
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column
+            )
+        """),
+        {"table": table, "column": column}
+    ).scalar()
+
+def _is_partitioned(conn, table: str) -> bool:
+    return conn.execute(
+        text("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table p
+                JOIN pg_class c ON c.oid = p.partrelid
+                WHERE c.relname = :table
+            )
+        """),
+        {"table": table}
+    ).scalar()
+
+# Migration : renommer l'ancienne table et libérer les noms de contraintes, index et séquence
+def _set_aside_legacy_table(conn):
+    conn.execute(text("ALTER TABLE appels_offres ADD COLUMN IF NOT EXISTS groupe_id BIGINT;"))
+    conn.execute(text("ALTER TABLE appels_offres ADD COLUMN IF NOT EXISTS lien_detail TEXT;"))
+    conn.execute(text("ALTER TABLE appels_offres RENAME TO appels_offres_legacy;"))
+    conn.execute(text("""
+        ALTER TABLE appels_offres_legacy
+            DROP CONSTRAINT IF EXISTS appels_offres_pkey,
+            DROP CONSTRAINT IF EXISTS appels_offres_numero_ordre_date_poste_key;
+    """))
+    conn.execute(text("DROP INDEX IF EXISTS appels_offres_groupe_a_calculer_idx;"))
+    conn.execute(text("ALTER SEQUENCE IF EXISTS appels_offres_id_seq RENAME TO appels_offres_legacy_id_seq;"))
+
+# Migration : recopier les AO (ids conservés) dans les partitions puis supprimer l'ancienne table
+def _copy_legacy_table(conn):
+    months = conn.execute(
+        text("SELECT DISTINCT date_trunc('month', date_poste) FROM appels_offres_legacy WHERE date_poste IS NOT NULL")
+    ).scalars().all()
+    ensure_month_partitions(months, conn)
+
+    columns = """
+        id, organisme, date_poste, type_offre, ville, numero_ordre, numero_ao,
+        date_limite, caution, estimation, description, marche, groupe_id, lien_detail
+    """
+    conn.execute(text(f"INSERT INTO appels_offres ({columns}) SELECT {columns} FROM appels_offres_legacy;"))
+    conn.execute(text("""
+        SELECT setval('appels_offres_id_seq', COALESCE((SELECT MAX(id) FROM appels_offres), 0) + 1, false);
+    """))
+    conn.execute(text("DROP TABLE appels_offres_legacy;"))
+
+def partition_name(month) -> str:
+    month = pd.Timestamp(month)
+    return f"appels_offres_{month.year}_{month.month:02d}"
+
+# Création des partitions mensuelles manquantes pour les dates à écrire.
+# Le cache n'est mis à jour qu'après validation : dans la transaction d'un appelant
+# (`conn` fourni), une annulation ferait disparaître la partition mais pas le cache.
+def ensure_month_partitions(dates, conn=None):
+    months = {pd.Timestamp(d).to_period("M") for d in dates if d is not None and not pd.isna(d)}
+    missing = sorted(m for m in months if partition_name(m.start_time) not in _known_partitions)
+    if not missing:
+        return
+
+    if conn is None:
+        with engine.begin() as conn:
+            created = _create_month_partitions(conn, missing)
+        _known_partitions.update(created)
+        return
+
+    _create_month_partitions(conn, missing)
+
+def _create_month_partitions(conn, months) -> list:
+    names = []
+    for month in months:
+        name = partition_name(month.start_time)
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {name} PARTITION OF appels_offres
+            FOR VALUES FROM ('{month.start_time.date()}') TO ('{(month + 1).start_time.date()}');
+        """))
+        names.append(name)
+    return names
+
 # Forcer UTF-8
 def force_utf8(value):
     if isinstance(value, str):
@@ -5,6 +5,12 @@ from components.notification import render_notification
 st.title("1️⃣ Lancer le Scraping des Appels d'Offres")
 st.write("Appuyez sur le bouton ci-dessous pour démarrer l'extraction des appels d'offres.")
 
+resume = st.checkbox(
+    "🔁 Reprendre la dernière extraction interrompue",
+    value=False,
+    help="Continue à partir de la dernière page sauvegardée au lieu de recommencer à la page 1."
+)
+
 if st.button("🚀 Démarrer le Scraping"):
     with st.spinner("🔎 Extraction en cours... Veuillez patienter."):
-        run_scraping_job(use_streamlit=True)
+        run_scraping_job(use_streamlit=True, resume=resume)
@@ -6,6 +6,9 @@ from datetime import datetime
 from db.queries import load_last_scraping_results
 from components.notification import render_notification
 
+# Fenêtre chargée depuis la base (mois de date de poste) : limite la lecture aux partitions récentes
+VISUALISATION_MONTHS = 12
+
 render_notification()
 st.title("📊 Visualisation et Téléchargement des Appels d'Offres")
 
@@ -17,7 +20,7 @@ if "ao_data" in st.session_state:
     logging.info("Chargement des données depuis la session Streamlit.")
 else:
     logging.info("Données non disponibles en session. Chargement depuis la base...")
-    df = load_last_scraping_results()   
+    df = load_last_scraping_results(months=VISUALISATION_MONTHS)
 
 if df is not None and not df.empty:
 